@@ -1,11 +1,65 @@
 from dataclasses import dataclass
-from typing import List, Optional, Any
+from typing import Callable, Iterable, Iterator, Optional, Any, Tuple, Union
+import functools
 import json
+import math
+import mmap
 import re
 import os
+import sys
+
+try:
+    # Motor `regex`: cuantificadores posesivos y alternancia en C sin backtracking extra
+    import regex as re2
+    _RE_FLAGS = re2.VERSION1
+    _POSSESSIVE = True
+except ImportError:
+    # Fallback a la stdlib (soporta cuantificadores posesivos desde Python 3.11)
+    re2 = re
+    _RE_FLAGS = 0
+    _POSSESSIVE = sys.version_info >= (3, 11)
+
+# En el fallback sin posesivos, "x++" / "x*+" se compilan como "x+" / "x*".
+# Sólo se reescriben esos dos cuantificadores (ver la restricción en _SPEC).
+_POSSESSIVE_RE = re.compile(r"(?<=[*+])\+")
+
+try:
+    # Serializador JSON en C, opcional (mucho más rápido que json con indent)
+    import orjson
+except ImportError:
+    orjson = None
+
+@functools.lru_cache(maxsize=None)
+def _get_master(spec: Tuple[Tuple[str, str], ...], binary: bool = False):
+    """
+    Compila (una sola vez por proceso y por spec) el regex maestro del tokenizador.
+    Con binary=True el patrón se codifica a UTF-8 ('¿' → b'\\xc2\\xbf') para
+    escanear bytes/mmap sin decodificar el archivo completo.
+    """
+    pattern = "|".join(f"(?P<{name}>{pat})" for name, pat in spec)
+    if not _POSSESSIVE:
+        pattern = _POSSESSIVE_RE.sub("", pattern)
+    return re2.compile(pattern.encode("utf-8") if binary else pattern, _RE_FLAGS)
+
+def _line_breaks(text, nl, cr):
+    """
+    Cuenta los saltos de línea de `text` como los de open() en modo texto
+    (\\r\\n, \\r y \\n valen uno) y devuelve (cantidad, índice del último).
+    """
+    n = text.count(nl)
+    if cr in text:
+        n += text.count(cr) - text.count(cr + nl)
+    return n, max(text.rfind(nl), text.rfind(cr))
+
+@functools.lru_cache(maxsize=256)
+def _number_from_text(text: str):
+    """Convierte un literal NUMBER; los literales repetidos ("0", "1", ...) salen de caché."""
+    return float(text) if "." in text else int(text)
 
 @dataclass
 class Token:
+    # __slots__ explícito (equivale a slots=True y también vale en Python < 3.10)
+    __slots__ = ("type", "value", "line", "col")
     type: str
     value: object
     line: int
@@ -15,7 +69,7 @@ class BrikTokenizer:
     """
     Tokenizador mínimo para BRIK (sólo lo necesario para tetris.brik y snake.brik):
       - Comentarios: '# ...' (ignorados)
-      - Strings: "..." con escapes estándar (\n, \t, \", \\)
+      - Strings: "..." con escapes estándar (\n, \t, \r, \", \\, \\xhh, \\uhhhh, ...)
       - Números: enteros y flotantes (incluye .5 y 42.)
       - Asignación: ':='
       - Diccionarios: '¿' ... '?'
@@ -23,62 +77,187 @@ class BrikTokenizer:
       - Separador: ','
       - Identificadores: [A-Za-z_][A-Za-z0-9_]*
       - Espacios/blancos y saltos de línea ignorados (sólo para line/col)
+
+    `source` puede ser str o un buffer UTF-8 (bytes/mmap); en ese caso sólo se
+    decodifica el texto de cada token emitido.
     """
-    _SPEC = [
-        ("COMMENT",      r"\#.*"),
-        ("STRING",       r"\"(?:\\.|[^\"\\])*\""),
-        ("NUMBER",       r"-?(?:\d+\.\d*|\.\d+|\d+)"),
+    # Ordenado por frecuencia en snake.brik/tetris.brik: las ramas que más
+    # aciertan se prueban primero (ningún par de patrones comparte prefijo).
+    # Restricción: el fallback sin posesivos borra todo '+' que siga a '*' o
+    # '+', así que un '+' literal debe escribirse [+] y nunca seguido de '+'.
+    _SPEC = (
+        # Blancos, saltos de línea y comentarios consecutivos en un solo match
+        ("SKIP",         r"(?:[ \t\r\n]++|\#[^\r\n]*+)++"),
+        ("IDENT",        r"[A-Za-z_][A-Za-z0-9_]*"),
         ("ASSIGN_COLON", r":="),
+        ("COMMA",        r","),
+        ("STRING",       r"\"(?:\\.|[^\"\\])*+\""),
+        ("NUMBER",       r"-?(?:[0-9]++\.[0-9]*+|\.[0-9]++|[0-9]++)"),
         ("LDICT",        r"¿"),
         ("RDICT",        r"\?"),
         ("LLIST",        r"¡"),
         ("RLIST",        r"!"),
-        ("COMMA",        r","),
-        ("IDENT",        r"[A-Za-z_][A-Za-z0-9_]*"),
-        ("NEWLINE",      r"\n"),
-        ("SKIP",         r"[ \t\r]+"),
-        ("MISMATCH",     r"."),   # cualquier otro carácter
-    ]
-    _MASTER = re.compile("|".join(f"(?P<{name}>{pat})" for name, pat in _SPEC))
-
-    def __init__(self, source: str):
+        # Sin comodín final: un hueco entre dos matches es un carácter inválido
+    )
+    _ESC = {
+        "n": "\n", "t": "\t", "r": "\r", '"': '"', "'": "'", "\\": "\\",
+        "a": "\a", "b": "\b", "f": "\f", "v": "\v",
+    }
+    _ESC_RE = re.compile(r"\\(?:x[0-9A-Fa-f]{2}|u[0-9A-Fa-f]{4}|U[0-9A-Fa-f]{8}|[0-7]{1,3}|.)")
+    # Tokens de texto fijo: se reutiliza el mismo str en vez de extraerlo del match
+    _PUNCT = {
+        "ASSIGN_COLON": ":=",
+        "LDICT":        "¿",
+        "RDICT":        "?",
+        "LLIST":        "¡",
+        "RLIST":        "!",
+        "COMMA":        ",",
+    }
+
+    def __init__(self, source: Union[str, bytes, mmap.mmap]):
         self.source = source
 
-    def tokenize(self):
-        tokens = []
+    @classmethod
+    def _unescape(cls, s: str) -> str:
+        """
+        Resuelve los escapes de un literal sin pasar por bytes/unicode_escape:
+        los de _ESC, octales (\\ooo), \\xhh, \\uhhhh y \\Uhhhhhhhh.
+        Un escape desconocido (p. ej. \\q) se conserva tal cual.
+        """
+        if "\\" not in s:
+            return s
+        return cls._ESC_RE.sub(cls._unescape_one, s)
+
+    @classmethod
+    def _unescape_one(cls, mo) -> str:
+        seq = mo.group()
+        c = seq[1]
+        if len(seq) == 2:
+            if c in cls._ESC:
+                return cls._ESC[c]
+            if c not in "01234567":
+                return seq
+        # octal, \x, \u o \U: el regex ya validó los dígitos
+        code = int(seq[1:], 8) if c in "01234567" else int(seq[2:], 16)
+        return chr(code) if code <= sys.maxunicode else seq
+
+    def tokenize(self) -> Iterator[Token]:
+        """Genera los tokens de forma perezosa (el parser los consume en streaming)."""
+        return self._scan(Token)
+
+    def tokenize_fast(self) -> Iterator[Tuple[str, Any, int, int]]:
+        """
+        Igual que tokenize(), pero genera tuplas planas (tipo, valor, línea, columna).
+        Evita construir Token por cada match; es la variante a usar bajo PyPy.
+        Las tuplas se parsean con BrikTupleParser.
+        """
+        return self._scan(None)
+
+    def _scan(self, make: Optional[Callable[[str, Any, int, int], Any]]):
+        """Bucle del tokenizador; `make` construye cada token (None → tupla plana)."""
+        unescape = self._unescape
+        punct = self._PUNCT
+        source = self.source
+        binary = not isinstance(source, str)
+        nl, cr = (b"\n", b"\r") if binary else ("\n", "\r")
+        # '\r' sólo llega desde mmap/bytes o un str que no pasó por open() en
+        # modo texto: se busca una vez y, si no aparece, se omite su manejo
+        has_cr = source.find(cr) != -1
+
+        pos = 0  # fin del match anterior
+        # Las líneas se cuentan en los tramos SKIP (y en los strings multilínea);
+        # line_start es el offset donde empieza la línea actual
         line = 1
         line_start = 0
-
-        for mo in self._MASTER.finditer(self.source):
+        # binary: offset/col del último token emitido, para que la columna en
+        # caracteres se calcule decodificando sólo el tramo desde ese token
+        prev_off = 0
+        prev_col = 1
+        for mo in _get_master(self._SPEC, binary).finditer(source):
+            start = mo.start()
+            if start != pos:
+                raise self._unexpected(source, pos, line, line_start)
+            pos = mo.end()
             kind = mo.lastgroup
-            text = mo.group()
-
-            if kind == "NEWLINE":
-                line += 1
-                line_start = mo.end()
-                continue
-            if kind in ("SKIP", "COMMENT"):
+            if kind == "SKIP":
+                text = mo.group()
+                if has_cr:
+                    n, last = _line_breaks(text, nl, cr)
+                    if n:
+                        line += n
+                        line_start = start + last + 1
+                elif nl in text:
+                    line += text.count(nl)
+                    line_start = start + text.rfind(nl) + 1
                 continue
 
-            col = mo.start() - line_start + 1
+            if binary:
+                # col en caracteres, no en bytes ('¿', '¡' ocupan 2 bytes)
+                if line_start > prev_off:
+                    col = len(source[line_start:start].decode("utf-8")) + 1
+                else:
+                    col = prev_col + len(source[prev_off:start].decode("utf-8"))
+                prev_off = start
+                prev_col = col
+            else:
+                col = start - line_start + 1
+
+            value = punct.get(kind)
+            if value is not None:
+                yield (kind, value, line, col) if make is None else make(kind, value, line, col)
+                continue
 
+            raw = mo.group()
+            text = raw.decode("utf-8") if binary else raw
             if kind == "STRING":
-                value = bytes(text[1:-1], "utf-8").decode("unicode_escape")
+                if has_cr:
+                    # igual que open() en modo texto, también para mmap/bytes
+                    text = text.replace("\r\n", "\n").replace("\r", "\n")
+                value = unescape(text[1:-1])
+                if nl in raw or has_cr and cr in raw:
+                    # string multilínea: el siguiente token ya está en otra línea
+                    tok_line = line
+                    n, last = _line_breaks(raw, nl, cr)
+                    line += n
+                    line_start = start + last + 1
+                    yield (kind, value, tok_line, col) if make is None else make(kind, value, tok_line, col)
+                    continue
             elif kind == "NUMBER":
-                value = float(text) if "." in text else int(text)
-            elif kind == "MISMATCH":
-                # Cualquier caracter que no pertenezca al lenguaje es error
-                raise SyntaxError(
-                    f"[{line}:{col}] Carácter inesperado: {repr(text)}.\n"
-                    f"Sugerencia: verifica la sintaxis BRIK (listas ¡ !, diccionarios ¿ ?, asignación :=, "
-                    f"strings entre comillas)."
-                )
+                value = _number_from_text(text)
             else:
-                value = text
-
-            tokens.append(Token(kind, value, line, col))
-
-        return tokens
+                # IDENT: un solo objeto str por nombre (hash cacheado en las tablas)
+                value = sys.intern(text)
+
+            yield (kind, value, line, col) if make is None else make(kind, value, line, col)
+
+        if pos != len(source):
+            raise self._unexpected(source, pos, line, line_start)
+
+    @staticmethod
+    def _unexpected(source, offset: int, line: int, line_start: int) -> SyntaxError:
+        """Cualquier caracter que no pertenezca al lenguaje es error."""
+        if isinstance(source, str):
+            col = offset - line_start + 1
+            text = source[offset]
+        else:
+            col = len(source[line_start:offset].decode("utf-8", "replace")) + 1
+            # el carácter puede ocupar hasta 4 bytes en UTF-8; si ningún prefijo
+            # decodifica, se reporta el byte inválido tal cual
+            text = source[offset:offset + 1]
+            for size in range(1, 5):
+                try:
+                    text = source[offset:offset + size].decode("utf-8")
+                    break
+                except UnicodeDecodeError:
+                    continue
+        return SyntaxError(
+            f"[{line}:{col}] Carácter inesperado: {repr(text)}.\n"
+            f"Sugerencia: verifica la sintaxis BRIK (listas ¡ !, diccionarios ¿ ?, asignación :=, "
+            f"strings entre comillas)."
+        )
+
+# Centinela para distinguir "no definido" de un símbolo cuyo valor es falsy
+_MISS = object()
 
 @dataclass
 class ParseError(Exception):
@@ -106,84 +285,90 @@ class BrikParser:
       - Ident no definido en contexto → {"ref": "ident"} para resolver luego.
     """
 
-    def __init__(self, tokens: List["Token"]):
-        self.tokens = tokens
-        self.i = 0
-        self.symbols = {}
+    # Valores que _parse_expr toma directamente, sin pasar por el dispatch
+    _LITERALS = frozenset(("STRING", "NUMBER"))
 
-    def _peek(self) -> Optional["Token"]:
-        return self.tokens[self.i] if self.i < len(self.tokens) else None
+    def __init__(self, tokens: Iterable["Token"]):
+        # Un solo token de lookahead: no hace falta materializar la lista
+        self._it = iter(tokens)
+        self._next = next(self._it, None)
+        self._last = None  # último token consumido, para ubicar errores de EOF
+        self.symbols = {}
+        # tipo de token inicial → manejador de la expresión (salvo _LITERALS)
+        self._expr_dispatch = {
+            "IDENT":  self._expr_ident,
+            "LLIST":  self._parse_list,
+            "LDICT":  self._parse_dict,
+        }
+
+    def _advance(self) -> "Token":
+        tok = self._last = self._next
+        self._next = next(self._it, None)
+        return tok
 
-    def _eat(self, expected_types: Optional[List[str]] = None) -> "Token":
-        tok = self._peek()
+    def _eat(self, expected: str) -> "Token":
+        tok = self._next
         if tok is None:
-            last = self.tokens[self.i-1] if self.i > 0 else None
+            last = self._last
             line, col = (last.line, last.col) if last else (1, 1)
             raise ParseError("Fin de archivo inesperado", line, col)
-        if expected_types and tok.type not in expected_types:
+        if tok.type != expected:
             raise ParseError(
-                f"Se esperaba {expected_types}, se encontró {tok.type} (‘{tok.value}’)",
+                f"Se esperaba {[expected]}, se encontró {tok.type} (‘{tok.value}’)",
                 tok.line, tok.col
             )
-        self.i += 1
-        return tok
+        return self._advance()
 
-    def _match(self, *types: str) -> Optional["Token"]:
-        tok = self._peek()
-        if tok and tok.type in types:
-            self.i += 1
-            return tok
+    def _match(self, expected: str) -> Optional["Token"]:
+        tok = self._next
+        if tok is not None and tok.type == expected:
+            return self._advance()
         return None
 
     # -------------- entrada --------------
     def parse(self) -> dict:
-        while self._peek() is not None:
+        symbols = self.symbols
+        while (t := self._next) is not None:
             # Permite comas sueltas entre sentencias si el archivo las trae
-            if self._peek().type == "COMMA":
-                self.i += 1
+            if t.type == "COMMA":
+                self._advance()
                 continue
-            if self._peek().type == "IDENT":
-                self._parse_assignment(self.symbols)
+            if t.type == "IDENT":
+                self._parse_assignment(symbols)
             else:
-                t = self._peek()
                 raise ParseError(
                     f"Se esperaba un identificador al inicio de sentencia, se encontró {t.type} (‘{t.value}’)",
                     t.line, t.col
                 )
-        return self.symbols
+        return symbols
 
     def _parse_assignment(self, table: dict):
-        key_tok = self._eat(["IDENT"])
-        self._eat(["ASSIGN_COLON"])  # ':='
-        value = self._parse_expr()
-        table[key_tok.value] = value
+        key_tok = self._eat("IDENT")
+        self._eat("ASSIGN_COLON")  # ':='
+        table[key_tok.value] = self._parse_expr()
 
     # -------------- expresiones --------------
     def _parse_expr(self) -> Any:
-        tok = self._peek()
+        tok = self._next
         if tok is None:
             raise ParseError("Se esperaba una expresión", 1, 1)
-
-        if tok.type == "STRING":
-            return self._eat().value
-        if tok.type == "NUMBER":
-            return self._eat().value
-        if tok.type == "IDENT":
-            name = self._eat().value
-            # Resolución temprana si ya existe en el entorno
-            if name in self.symbols:
-                return self.symbols[name]
-            return {"ref": name}
-        if tok.type == "LLIST":
-            return self._parse_list()
-        if tok.type == "LDICT":
-            return self._parse_dict()
-
-        raise ParseError(f"Expresión inesperada: {tok.type} (‘{tok.value}’)", tok.line, tok.col)
+        # STRING/NUMBER: el caso más común, sin llamada extra al manejador
+        if tok.type in self._LITERALS:
+            return self._advance().value
+        handler = self._expr_dispatch.get(tok.type)
+        if handler is None:
+            raise ParseError(f"Expresión inesperada: {tok.type} (‘{tok.value}’)", tok.line, tok.col)
+        return handler()
+
+    def _expr_ident(self) -> Any:
+        name = self._advance().value
+        # Resolución temprana si ya existe en el entorno (un solo lookup)
+        value = self.symbols.get(name, _MISS)
+        return value if value is not _MISS else {"ref": name}
 
     # -------------- compuestos --------------
     def _parse_list(self) -> list:
-        self._eat(["LLIST"])  # '¡'
+        self._advance()  # '¡' (ya comprobado por _parse_expr)
         items = []
         # lista vacía
         if self._match("RLIST"):  # '!'
@@ -193,12 +378,11 @@ class BrikParser:
             items.append(self._parse_expr())
             if self._match("COMMA"):
                 continue
-            self._eat(["RLIST"])  # '!'
-            break
-        return items
+            self._eat("RLIST")  # '!'
+            return items
 
     def _parse_dict(self) -> dict:
-        self._eat(["LDICT"])  # '¿'
+        self._advance()  # '¿' (ya comprobado por _parse_expr)
         data = {}
         # diccionario vacío
         if self._match("RDICT"):  # '?'
@@ -208,73 +392,211 @@ class BrikParser:
             if self._match("COMMA"):
                 continue
 
-            key_tok = self._eat(["IDENT"])
-            self._eat(["ASSIGN_COLON"])  # ':=' también dentro de ¿ ? 
-            value = self._parse_expr()
-            data[key_tok.value] = value
+            key_tok = self._eat("IDENT")
+            self._eat("ASSIGN_COLON")  # ':=' también dentro de ¿ ?
+            data[key_tok.value] = self._parse_expr()
 
             if self._match("COMMA"):
                 continue
-            nxt = self._peek()
+            nxt = self._next
             if nxt is None:
                 # faltó cerrar '?'
                 raise ParseError("Falta cerrar el diccionario con '?'", key_tok.line, key_tok.col)
             if nxt.type == "RDICT":
-                self._eat(["RDICT"])
-                break
-        return data
+                self._advance()
+                return data
+
+class BrikTupleParser(BrikParser):
+    """
+    BrikParser para las tuplas (tipo, valor, línea, columna) de
+    tokenize_fast(): mismas reglas, con los campos leídos por índice.
+    """
+
+    def _eat(self, expected: str) -> tuple:
+        tok = self._next
+        if tok is None:
+            last = self._last
+            line, col = (last[2], last[3]) if last else (1, 1)
+            raise ParseError("Fin de archivo inesperado", line, col)
+        if tok[0] != expected:
+            raise ParseError(
+                f"Se esperaba {[expected]}, se encontró {tok[0]} (‘{tok[1]}’)",
+                tok[2], tok[3]
+            )
+        return self._advance()
+
+    def _match(self, expected: str) -> Optional[tuple]:
+        tok = self._next
+        if tok is not None and tok[0] == expected:
+            return self._advance()
+        return None
+
+    def parse(self) -> dict:
+        symbols = self.symbols
+        while (t := self._next) is not None:
+            # Permite comas sueltas entre sentencias si el archivo las trae
+            if t[0] == "COMMA":
+                self._advance()
+                continue
+            if t[0] == "IDENT":
+                self._parse_assignment(symbols)
+            else:
+                raise ParseError(
+                    f"Se esperaba un identificador al inicio de sentencia, se encontró {t[0]} (‘{t[1]}’)",
+                    t[2], t[3]
+                )
+        return symbols
+
+    def _parse_assignment(self, table: dict):
+        key_tok = self._eat("IDENT")
+        self._eat("ASSIGN_COLON")  # ':='
+        table[key_tok[1]] = self._parse_expr()
+
+    def _parse_expr(self) -> Any:
+        tok = self._next
+        if tok is None:
+            raise ParseError("Se esperaba una expresión", 1, 1)
+        # STRING/NUMBER: el caso más común, sin llamada extra al manejador
+        if tok[0] in self._LITERALS:
+            return self._advance()[1]
+        handler = self._expr_dispatch.get(tok[0])
+        if handler is None:
+            raise ParseError(f"Expresión inesperada: {tok[0]} (‘{tok[1]}’)", tok[2], tok[3])
+        return handler()
+
+    def _expr_ident(self) -> Any:
+        name = self._advance()[1]
+        # Resolución temprana si ya existe en el entorno (un solo lookup)
+        value = self.symbols.get(name, _MISS)
+        return value if value is not _MISS else {"ref": name}
+
+    def _parse_dict(self) -> dict:
+        self._advance()  # '¿' (ya comprobado por _parse_expr)
+        data = {}
+        # diccionario vacío
+        if self._match("RDICT"):  # '?'
+            return data
+
+        while True:
+            if self._match("COMMA"):
+                continue
+
+            key_tok = self._eat("IDENT")
+            self._eat("ASSIGN_COLON")  # ':=' también dentro de ¿ ?
+            data[key_tok[1]] = self._parse_expr()
+
+            if self._match("COMMA"):
+                continue
+            nxt = self._next
+            if nxt is None:
+                # faltó cerrar '?'
+                raise ParseError("Falta cerrar el diccionario con '?'", key_tok[2], key_tok[3])
+            if nxt[0] == "RDICT":
+                self._advance()
+                return data
+
+# Por debajo de este tamaño el costo de mapear el archivo supera al de read()
+_MMAP_MIN_SIZE = 64 * 1024
 
 def load_file_content(filepath):
     """
     Carga el contenido de un archivo de texto.
     Maneja el error si el archivo no existe.
+    Los archivos grandes se devuelven como mmap de sólo lectura (bytes UTF-8)
+    en lugar de str, para no duplicarlos en memoria.
     """
     if not os.path.exists(filepath):
         print(f"Error: El archivo '{filepath}' no se encontro. Asegurate de que el archivo exista en la misma carpeta que el script.")
         return None
-    
-    with open(filepath, 'r', encoding='utf-8') as file:
-        return file.read()
+
+    if os.path.getsize(filepath) < _MMAP_MIN_SIZE:
+        with open(filepath, 'r', encoding='utf-8') as file:
+            return file.read()
+
+    with open(filepath, 'rb') as file:
+        return mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+def _floats_match_json(ast) -> bool:
+    """
+    Indica si orjson escribirá los floats del AST igual que json: finitos
+    (orjson emite null para inf/nan) y sin exponente (json escribe 1e+20 y
+    9.99e-05, orjson 1e20 y 0.0000999).
+    """
+    # En la pila sólo entran contenedores; el resto se revisa en el sitio
+    stack = [ast]
+    push = stack.append
+    isfinite = math.isfinite
+    while stack:
+        node = stack.pop()
+        for value in (node.values() if type(node) is dict else node):
+            kind = type(value)
+            if kind is dict or kind is list:
+                push(value)
+            elif kind is float:
+                if not isfinite(value) or value and not 1e-4 <= abs(value) < 1e16:
+                    return False
+    return True
+
+def _dump_ast(ast) -> bytes:
+    """
+    Serializa el AST a JSON con sangría de 2 espacios (el único formato de
+    orjson), byte a byte igual esté o no orjson instalado: los AST que
+    orjson escribiría distinto se serializan con json.
+    """
+    if orjson is not None and _floats_match_json(ast):
+        try:
+            return orjson.dumps(ast, option=orjson.OPT_INDENT_2)
+        except orjson.JSONEncodeError:
+            pass  # p. ej. enteros fuera de 64 bits
+    return json.dumps(ast, indent=2, ensure_ascii=False).encode("utf-8")
 
 def save_ast_to_file(ast, filepath):
     """
     Guarda el AST en un archivo de texto en formato JSON.
     """
     try:
-        with open(filepath, 'w', encoding='utf-8') as file:
-            json.dump(ast, file, indent=4)
+        # Se serializa antes de abrir: un error no deja el archivo vacío
+        data = _dump_ast(ast)
+        with open(filepath, 'wb') as file:
+            file.write(data)
         print(f"AST guardado exitosamente en '{filepath}'")
     except Exception as e:
         print(f"Error al guardar el archivo: {e}")
 
 # --- Zona de ejecucion ---
-# 1. Especifica la ruta del archivo a procesar
-file_path = "snake.brik"
-ast_file_path = "arbol.ast"
-
-# 2. Carga el contenido del archivo
-source_code = load_file_content(file_path)
-
-if source_code:
-    # 3. Analisis Lexico
-    print("--- Analisis Lexico (Lexer) ---")
-    tokenizer = BrikTokenizer(source_code)
-    tokens = tokenizer.tokenize()
-    print("Tokens reconocidos:")
-    for token in tokens:
-        print(token)
-    
-    # 4. Analisis Sintactico y gestion de Tabla de Simbolos
-    print("\n--- Analisis Sintactico (Parser) ---")
-    parser = BrikParser(tokens)
-    try:
-        ast_and_symbol_table = parser.parse()
-        print("Sintaxis correcta. Se ha construido el Arbol de Sintaxis Abstracta (AST) / Tabla de Simbolos.")
-        print("Contenido del AST:")
-        print(json.dumps(ast_and_symbol_table, indent=4))
-        
-        # 5. Guardar el AST en el archivo
-        save_ast_to_file(ast_and_symbol_table, ast_file_path)
-        
-    except (SyntaxError, NameError) as e:
-        print(f"Error en la sintaxis: {e}")
+if __name__ == "__main__":
+    # 1. Especifica la ruta del archivo a procesar
+    file_path = "snake.brik"
+    ast_file_path = "arbol.ast"
+
+    # 2. Carga el contenido del archivo
+    source_code = load_file_content(file_path)
+
+    if source_code:
+        # 3. Analisis Lexico
+        print("--- Analisis Lexico (Lexer) ---")
+        tokenizer = BrikTokenizer(source_code)
+        try:
+            tokens = list(tokenizer.tokenize())
+        finally:
+            # Los valores de los tokens ya están decodificados: el mmap sobra
+            if isinstance(source_code, mmap.mmap):
+                source_code.close()
+        print("Tokens reconocidos:")
+        for token in tokens:
+            print(token)
+
+        # 4. Analisis Sintactico y gestion de Tabla de Simbolos
+        print("\n--- Analisis Sintactico (Parser) ---")
+        parser = BrikParser(tokens)
+        try:
+            ast_and_symbol_table = parser.parse()
+            print("Sintaxis correcta. Se ha construido el Arbol de Sintaxis Abstracta (AST) / Tabla de Simbolos.")
+            print("Contenido del AST:")
+            print(_dump_ast(ast_and_symbol_table).decode("utf-8"))
+
+            # 5. Guardar el AST en el archivo
+            save_ast_to_file(ast_and_symbol_table, ast_file_path)
+
+        except (SyntaxError, NameError) as e:
+            print(f"Error en la sintaxis: {e}")
@@ -0,0 +1,234 @@
+import contextlib
+import io
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import analizador
+from analizador import (BrikParser, BrikTokenizer, BrikTupleParser, ParseError, _dump_ast,
+                        load_file_content, save_ast_to_file)
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def _read(name):
+    with open(os.path.join(HERE, name), encoding="utf-8") as f:
+        return f.read()
+
+
+class BinarySourceTest(unittest.TestCase):
+
+    def test_str_and_bytes_sources_give_same_tokens(self):
+        sources = [
+            _read("snake.brik"),
+            _read("tetris.brik"),
+            'a := ¿ x := "ñ¿¡", y := ¡ 1, -2.5, "é" ! ?\n  b := a # ¿comentario?\n',
+        ]
+        for source in sources:
+            with self.subTest(source=source[:30]):
+                expected = list(BrikTokenizer(source).tokenize())
+                self.assertEqual(list(BrikTokenizer(source.encode("utf-8")).tokenize()), expected)
+
+    def test_large_file_is_mmapped_and_matches_str(self):
+        # Una sola línea larga con caracteres multibyte: ejercita la columna incremental
+        body = ", ".join(f'k{i} := ¡ "v¿{i}", {i} !' for i in range(4000))
+        source = f"a := ¿ {body} ?\n\nb := a\n"
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "big.brik")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(source)
+
+            content = load_file_content(path)
+            self.assertNotIsInstance(content, str)
+            try:
+                tokens = list(BrikTokenizer(content).tokenize())
+            finally:
+                content.close()
+
+        self.assertEqual(tokens, list(BrikTokenizer(source).tokenize()))
+        self.assertEqual(BrikParser(tokens).parse(),
+                         BrikParser(BrikTokenizer(source).tokenize()).parse())
+
+    def _small_and_large(self, data):
+        """Tokeniza `data` leído como str (archivo pequeño) y como mmap (relleno al final)."""
+        results = []
+        with tempfile.TemporaryDirectory() as tmp:
+            for name, padding in (("small.brik", b""), ("large.brik", b"\n#" + b"x" * (64 * 1024))):
+                path = os.path.join(tmp, name)
+                with open(path, "wb") as f:
+                    f.write(data + padding)
+                content = load_file_content(path)
+                try:
+                    results.append(list(BrikTokenizer(content).tokenize()))
+                finally:
+                    if not isinstance(content, str):
+                        content.close()
+        return results
+
+    def test_crlf_and_lone_cr_match_text_mode(self):
+        small, large = self._small_and_large(b'a := "x\r\ny\rz"\r\nb := 1 # c\rc := 2\r\n')
+        self.assertEqual(small, large)
+        self.assertEqual([(t.value, t.line, t.col) for t in small if t.type != "ASSIGN_COLON"],
+                         [("a", 1, 1), ("x\ny\nz", 1, 6), ("b", 4, 1), (1, 4, 6), ("c", 5, 1), (2, 5, 6)])
+
+    def test_non_ascii_digits_are_rejected(self):
+        source = "a := \u0663"  # '٣', dígito árabe-índico
+        expected = "[1:6] Carácter inesperado: '\u0663'."
+        for src in (source, source.encode("utf-8")):
+            with self.subTest(source=src):
+                with self.assertRaises(SyntaxError) as ctx:
+                    list(BrikTokenizer(src).tokenize())
+                self.assertEqual(str(ctx.exception).splitlines()[0], expected)
+
+
+class RegexEngineTest(unittest.TestCase):
+    """El corpus tokeniza igual con el módulo regex y sin cuantificadores posesivos."""
+
+    _SOURCES = ("snake.brik", "tetris.brik")
+
+    def _tokens_with(self, engine, flags, possessive):
+        expected = {name: list(BrikTokenizer(_read(name)).tokenize()) for name in self._SOURCES}
+        analizador._get_master.cache_clear()
+        self.addCleanup(analizador._get_master.cache_clear)
+        with mock.patch.object(analizador, "re2", engine), \
+                mock.patch.object(analizador, "_RE_FLAGS", flags), \
+                mock.patch.object(analizador, "_POSSESSIVE", possessive):
+            for name in self._SOURCES:
+                source = _read(name)
+                with self.subTest(source=name):
+                    self.assertEqual(list(BrikTokenizer(source).tokenize()), expected[name])
+                    self.assertEqual(list(BrikTokenizer(source.encode("utf-8")).tokenize()), expected[name])
+
+    def test_regex_module(self):
+        try:
+            import regex
+        except ImportError:
+            self.skipTest("el módulo regex no está instalado")
+        self._tokens_with(regex, regex.VERSION1, True)
+
+    def test_stdlib_re_without_possessive_quantifiers(self):
+        self._tokens_with(analizador.re, 0, False)
+
+
+class LinePositionTest(unittest.TestCase):
+
+    def test_newlines_inside_strings_advance_the_line(self):
+        source = 'a := "x\ny"\nb := 1'
+        bad = source + ' "¿\n" @'
+        for encode in (False, True):
+            with self.subTest(binary=encode):
+                src = source.encode("utf-8") if encode else source
+                tokens = [(t.type, t.line, t.col) for t in BrikTokenizer(src).tokenize()]
+                self.assertEqual(tokens, [("IDENT", 1, 1), ("ASSIGN_COLON", 1, 3), ("STRING", 1, 6),
+                                          ("IDENT", 3, 1), ("ASSIGN_COLON", 3, 3), ("NUMBER", 3, 6)])
+                with self.assertRaises(SyntaxError) as ctx:
+                    list(BrikTokenizer(bad.encode("utf-8") if encode else bad).tokenize())
+                self.assertTrue(str(ctx.exception).startswith("[4:3] "))
+
+
+class UnexpectedCharacterTest(unittest.TestCase):
+
+    def _error(self, source):
+        with self.assertRaises(SyntaxError) as ctx:
+            list(BrikTokenizer(source).tokenize())
+        return str(ctx.exception).splitlines()[0]
+
+    def test_gap_in_the_middle_and_at_the_end(self):
+        cases = [
+            ("a := @ 1", "[1:6] Carácter inesperado: '@'."),
+            ("a := ¡1!\n  b := 2 $", "[2:10] Carácter inesperado: '$'."),
+            ("a := ¿ x := ñ ?", "[1:13] Carácter inesperado: 'ñ'."),
+            ('a := "sin cerrar', "[1:6] Carácter inesperado: '\"'."),
+        ]
+        for source, expected in cases:
+            with self.subTest(source=source):
+                self.assertEqual(self._error(source), expected)
+                self.assertEqual(self._error(source.encode("utf-8")), expected)
+
+    def test_invalid_utf8_byte_is_reported_itself(self):
+        self.assertEqual(self._error(b"a := \xffb"), "[1:6] Carácter inesperado: b'\\xff'.")
+
+
+class UnescapeTest(unittest.TestCase):
+
+    def test_escape_table(self):
+        cases = [
+            (r"a\nb\tc", "a\nb\tc"),
+            (r"a\rb", "a\rb"),
+            (r"\"\'\\", "\"'\\"),
+            (r"\a\b\f\v", "\a\b\f\v"),
+            (r"\101\0\7", "A\x00\x07"),
+            (r"\x41", "A"),
+            (r"\u00e9", "é"),
+            (r"\U0001F600", "\U0001F600"),
+            (r"\q", "\\q"),
+            (r"\x4", "\\x4"),
+            ("ñ¿¡", "ñ¿¡"),
+            (r"ñ\t", "ñ\t"),
+        ]
+        for literal, expected in cases:
+            with self.subTest(literal=literal):
+                self.assertEqual(BrikTokenizer._unescape(literal), expected)
+
+
+class TokenizeFastTest(unittest.TestCase):
+
+    def test_tuples_match_tokens(self):
+        source = _read("snake.brik")
+        tokens = list(BrikTokenizer(source).tokenize())
+        tuples = list(BrikTokenizer(source).tokenize_fast())
+        self.assertEqual([(t.type, t.value, t.line, t.col) for t in tokens], tuples)
+        self.assertNotEqual(tokens[0], tuples[0])  # Token no es una tupla
+        self.assertEqual(BrikParser(tokens).parse(), BrikTupleParser(tuples).parse())
+
+    def test_tuple_parser_reports_the_same_errors(self):
+        for source in ("a := ", "a := ¿ x := 1", "a := ¡ 1, ?", ":= 1", "a := ¿ 1 := 2 ?"):
+            with self.subTest(source=source):
+                with self.assertRaises(ParseError) as expected:
+                    BrikParser(BrikTokenizer(source).tokenize()).parse()
+                with self.assertRaises(ParseError) as ctx:
+                    BrikTupleParser(BrikTokenizer(source).tokenize_fast()).parse()
+                self.assertEqual(str(ctx.exception), str(expected.exception))
+
+
+class SaveAstTest(unittest.TestCase):
+
+    def _parse(self, source):
+        return BrikParser(BrikTokenizer(source).tokenize()).parse()
+
+    def test_same_output_with_or_without_orjson(self):
+        ast = self._parse(_read("tetris.brik"))
+        ast["extra"] = {"ñ": "é¿", "vacío": {}, "lista": [], "f": [0.5, 3.0, -2.5, 0.0]}
+        self.assertEqual(_dump_ast(ast), json.dumps(ast, indent=2, ensure_ascii=False).encode("utf-8"))
+        # json escribe estos con exponente (1e+20, 9.99e-05); orjson no
+        ast["extra"]["f"] += [1e20, -1.5e16, 9.99e-05]
+        self.assertEqual(_dump_ast(ast), json.dumps(ast, indent=2, ensure_ascii=False).encode("utf-8"))
+
+    @unittest.skipIf(analizador.orjson is None, "orjson no está instalado")
+    def test_null_in_strings_does_not_force_the_json_fallback(self):
+        ast = self._parse('null := "null", nulls := ¿ null := ¡ "null" ! ?')
+        with mock.patch.object(analizador.json, "dumps", side_effect=AssertionError("fallback")):
+            data = _dump_ast(ast)
+        self.assertEqual(data, json.dumps(ast, indent=2, ensure_ascii=False).encode("utf-8"))
+
+    def test_values_outside_orjson_range(self):
+        self.assertEqual(json.loads(_dump_ast(self._parse("a := 123456789012345678901234567890"))),
+                         {"a": 123456789012345678901234567890})
+        self.assertIn(b"Infinity", _dump_ast(self._parse("a := " + "9" * 400 + ".")))
+
+    def test_failed_save_keeps_previous_file(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "arbol.ast")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write("previo")
+            with contextlib.redirect_stdout(io.StringIO()) as out:
+                save_ast_to_file({"a": object()}, path)
+            self.assertIn("Error al guardar", out.getvalue())
+            with open(path, encoding="utf-8") as f:
+                self.assertEqual(f.read(), "previo")
+
+
+if __name__ == "__main__":
+    unittest.main()